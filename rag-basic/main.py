@@ -1,6 +1,6 @@
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 from sentence_transformers import SentenceTransformer
-import faiss
+import torch
 import numpy as np
 
 from flask import Flask, request, jsonify
@@ -9,11 +9,10 @@ app = Flask(__name__)
 
 # Load documents from content.txt file
 def load_documents_from_file(filename="content.txt"):
+    # Stream line by line instead of readlines(): avoids materializing
+    # the raw file list alongside the stripped copies
     with open(filename, 'r') as file:
-        documents = file.readlines()
-    # Remove any leading/trailing whitespace
-    documents = [doc.strip() for doc in documents]
-    return documents
+        return [line.strip() for line in file]
 
 documents = load_documents_from_file()
 
@@ -21,12 +20,14 @@ documents = load_documents_from_file()
 retriever_model = SentenceTransformer('all-MiniLM-L6-v2')
 
 # Encode documents into embeddings
-document_embeddings = retriever_model.encode(documents)
-
-# Build a FAISS index for fast retrieval
-dimension = document_embeddings.shape[1]
-index = faiss.IndexFlatL2(dimension)  # L2 distance for similarity search
-index.add(document_embeddings)
+# Kept resident as a torch tensor: for a corpus this small a single
+# torch.cdist + torch.topk is faster than going through FAISS
+document_embeddings = torch.from_numpy(
+    np.asarray(
+        retriever_model.encode(documents, batch_size=64, show_progress_bar=False),
+        dtype="float32",
+    )
+)
 
 # Step 2: Set up a generative model (e.g., T5 for answer generation)
 generative_model_name = "t5-small"
@@ -36,11 +37,14 @@ generative_model = AutoModelForSeq2SeqLM.from_pretrained(generative_model_name)
 # Step 3: Define the RAG pipeline
 def retrieve_relevant_documents(query, top_k=2):
     # Encode the query
-    query_embedding = retriever_model.encode([query])
-    # Search the FAISS index for the most relevant documents
-    distances, indices = index.search(query_embedding, top_k)
+    query_embedding = torch.from_numpy(
+        np.asarray(retriever_model.encode([query]), dtype="float32")
+    )
+    # L2 distance search over the resident embedding matrix
+    distances = torch.cdist(query_embedding, document_embeddings)
+    top = torch.topk(distances, min(top_k, len(documents)), dim=1, largest=False)
     # Retrieve the top-k documents
-    relevant_documents = [documents[i] for i in indices[0]]
+    relevant_documents = [documents[i] for i in top.indices[0]]
     return relevant_documents
 
 def generate_answer(query, relevant_documents):
@@ -14,3 +14,21 @@ TOP_K = int(os.getenv("TOP_K", 10))
 
 # Maximum tokens to generate for answer
 MAX_NEW_TOKENS = int(os.getenv("MAX_NEW_TOKENS", 512))
+
+# Generator backend: "onnx" runs the T5 encoder/decoder through ONNX
+# Runtime (fused kernels, no per-token eager dispatch); "torch" keeps
+# the PyTorch model. Falls back to torch when optimum is not installed.
+GEN_BACKEND = os.getenv("GEN_BACKEND", "onnx")
+
+# Set QUANTIZE_GEN=int8 to run the generator with dynamically quantized
+# int8 Linear layers (~30% faster decoding on CPU, ~4x smaller weights)
+QUANTIZE_GEN = os.getenv("QUANTIZE_GEN", "")
+
+# Directory for cached embeddings / FAISS indexes (keyed by content hash)
+CACHE_DIR = os.getenv("CACHE_DIR", "cache")
+
+# Corpora smaller than FAISS_MIN_DOCS are searched with a plain torch
+# matmul (exact); larger ones get a FAISS HNSW index, where efSearch
+# trades recall for latency
+FAISS_MIN_DOCS = int(os.getenv("FAISS_MIN_DOCS", 50_000))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", 16))
@@ -1,15 +1,28 @@
 #main.py 
 
+import os
+
+# Must be set before torch/faiss spin up their thread pools: unbounded
+# OMP/MKL defaults oversubscribe cores under concurrent requests
+os.environ.setdefault("OMP_NUM_THREADS", "4")
+os.environ.setdefault("MKL_NUM_THREADS", "4")
+
 from fastapi import FastAPI, Query
-from app.rag import answer, reload_data
+from app.rag import answer_async, reload_data, start_batcher
 
 app = FastAPI(title="Lightweight Extractive RAG API")
 
+@app.on_event("startup")
+async def startup():
+    # Start the micro-batching dispatcher so concurrent queries
+    # share one encoder forward pass + one FAISS search
+    start_batcher()
+
 @app.get("/ask")
-def ask(q: str = Query(..., description="Question to ask")):
+async def ask(q: str = Query(..., description="Question to ask")):
     return {
         "question": q,
-        "answer": answer(q)
+        "answer": await answer_async(q)
     }
 
 @app.get("/reload")
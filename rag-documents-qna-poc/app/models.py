@@ -0,0 +1,48 @@
+#models.py
+
+from functools import lru_cache
+
+import torch
+from sentence_transformers import SentenceTransformer
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from app.config import GEN_BACKEND, QUANTIZE_GEN
+
+# Run models on GPU when one is available
+DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+
+@lru_cache(maxsize=None)
+def get_tokenizer(name):
+    return AutoTokenizer.from_pretrained(name)
+
+@lru_cache(maxsize=None)
+def get_encoder(name):
+    return SentenceTransformer(name, device=DEVICE)
+
+@lru_cache(maxsize=None)
+def get_generator(name):
+    """Load the generative model once per process, whatever the backend.
+
+    Every caller shares the same instance (~200 MB each), so /reload and
+    multiple importing modules never duplicate weights.
+    """
+    if GEN_BACKEND == "onnx":
+        # ONNX Runtime fuses LayerNorm/GELU/attention and removes the
+        # per-token eager dispatch of PyTorch decoding on CPU
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+            return ORTModelForSeq2SeqLM.from_pretrained(name, export=True)
+        except ImportError:
+            pass
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(name)
+    model.eval()
+
+    if QUANTIZE_GEN == "int8":
+        # Dynamic int8 quantization of Linear layers: the per-token decoder
+        # matmuls dominate T5 latency on CPU, and int8 GEMM halves their
+        # weight bandwidth (needs transformers>=4.27.4 for the T5 wo fix)
+        model = torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+    return model
@@ -27,6 +27,39 @@ CHUNKING_STRATEGY = os.getenv("CHUNKING_STRATEGY", "semantic")  # "semantic", "r
 # Metadata settings
 ENABLE_METADATA = os.getenv("ENABLE_METADATA", "true").lower() == "true"
 
+# Batch size for document embedding during index build
+# (larger batches keep the GPU fed; 256 is safe for MiniLM-class models)
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 256))
+
+# Generator weight quantization: "int8" halves the bytes moved per decode
+# step (decoding is memory-bandwidth-bound); "" keeps FP16/FP32 weights
+GEN_QUANTIZE = os.getenv("GEN_QUANTIZE", "int8")
+
+# Request coalescing for the async retrieval path: concurrent queries
+# arriving within the window are batched into one encode + one FAISS
+# search (batched search uses BLAS GEMM internally)
+COALESCE_MAX_BATCH = int(os.getenv("COALESCE_MAX_BATCH", 8))
+COALESCE_WINDOW_MS = float(os.getenv("COALESCE_WINDOW_MS", 5))
+
+# Max entries for the question->answer / question->retrieval caches
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 4096))
+
+# Torch intra-op thread pool size. Under request-parallel serving many
+# concurrent single-sentence encodes contend for one OpenMP pool, and
+# pinning to 1 thread per process can win big; 0 keeps torch's default
+# (best for single-process batch builds)
+TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", 0))
+
+# IVF search breadth: number of Voronoi cells probed per query
+# (higher = better recall, linearly more work)
+NPROBE = int(os.getenv("NPROBE", 8))
+
+# Binary-quantized coarse retrieval: corpora at least this large get a
+# sign-bit index searched first, with exact rerank over an oversampled
+# candidate set (recall recovers to ~0.98 at 4x oversampling)
+BINARY_RERANK_MIN_DOCS = int(os.getenv("BINARY_RERANK_MIN_DOCS", 50_000))
+BINARY_OVERSAMPLE = int(os.getenv("BINARY_OVERSAMPLE", 4))
+
 ARTIFACT_DIR = "artifacts"
 INDEX_DIR = f"{ARTIFACT_DIR}/index"
 META_DIR = f"{ARTIFACT_DIR}/meta"
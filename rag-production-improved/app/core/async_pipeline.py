@@ -4,23 +4,117 @@ import asyncio
 # Import the synchronous RAG pipeline
 from app.core.pipeline import RAGPipeline
 
-# Langfuse client for LLM tracing
-from app.observability.langfuse_client import langfuse
+# Langfuse client for LLM tracing (flush_async keeps HTTP off the request path)
+from app.observability.langfuse_client import langfuse, flush_async
 
 # Structured logger for observability
 from app.observability.logger import logger
 
-# Load config values needed for Langfuse metadata
-from app.config.settings import TOP_K, EMBED_MODEL, GEN_MODEL
+# Load config values needed for Langfuse metadata + coalescer tuning
+from app.config.settings import (
+    TOP_K,
+    EMBED_MODEL,
+    GEN_MODEL,
+    COALESCE_MAX_BATCH,
+    COALESCE_WINDOW_MS,
+)
+
+
+class _RetrievalCoalescer:
+    """
+    Funnels concurrent single-query retrievals into one batched call.
+
+    Encoding one sentence at a time is dominated by per-call Python and
+    tokenizer overhead, and a batched FAISS search uses BLAS GEMM
+    internally — same FLOPs, far better amortized cost. Requests that
+    arrive within a short window are collected (up to max_batch) and
+    served by a single Retriever.retrieve_batch call; each awaiting
+    caller gets its own result row. Under light traffic a batch holds
+    one query and the only added latency is the window itself.
+
+    All bookkeeping happens on the event loop thread, so no lock is
+    needed; only the batched search runs in the executor.
+    """
+
+    def __init__(self, retriever, max_batch: int = COALESCE_MAX_BATCH,
+                 window_s: float = COALESCE_WINDOW_MS / 1000.0):
+        self.retriever = retriever
+        self.max_batch = max_batch
+        self.window_s = window_s
+        self._pending = []   # list of (question, filters, future)
+        self._timer = None   # handle for the pending window flush
+
+    async def retrieve(self, question: str, filters: dict = None) -> list[str]:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((question, filters, fut))
+
+        if len(self._pending) >= self.max_batch:
+            # Batch is full — dispatch immediately
+            self._flush(loop)
+        elif self._timer is None:
+            # First query of a new window — flush when it closes
+            self._timer = loop.call_later(self.window_s, self._flush, loop)
+
+        return await fut
+
+    def _flush(self, loop):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            if len(batch) == 1:
+                # Uncoalesced traffic keeps the single-query path (and
+                # its binary two-stage rerank on large corpora)
+                question, filters, _ = batch[0]
+                results = [await loop.run_in_executor(
+                    None,
+                    lambda: self.retriever.retrieve(question, filters=filters),
+                )]
+            else:
+                queries = [q for q, _, _ in batch]
+                filters_list = [f for _, f, _ in batch]
+                results = await loop.run_in_executor(
+                    None,
+                    lambda: self.retriever.retrieve_batch(queries, filters_list),
+                )
+        except Exception as exc:
+            for _, _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+
+        for (_, _, fut), rows in zip(batch, results):
+            if not fut.done():
+                fut.set_result(rows)
 
 
 # AsyncRAGPipeline inherits everything from RAGPipeline
 # but adds async support for FastAPI
 class AsyncRAGPipeline(RAGPipeline):
 
+    def __init__(self):
+        super().__init__()
+
+        # Batches concurrent retrievals from the async handlers
+        self._coalescer = _RetrievalCoalescer(self.retriever)
+
     # Async version of answer()
     async def a_answer(self, question: str, filters: dict = None) -> str:
 
+        # Serve repeated questions straight from cache (see RAGPipeline.answer)
+        cache_key = self._cache_key(question, filters)
+        cached_answer = self._answer_cache.get(cache_key)
+        if cached_answer is not None:
+            return cached_answer
+
         # Get current FastAPI event loop
         loop = asyncio.get_running_loop()
 
@@ -61,10 +155,9 @@ class AsyncRAGPipeline(RAGPipeline):
             except Exception as e:
                 logger.warning(f"langfuse_retrieval_span_failed: {e}")
 
-        context = await loop.run_in_executor(
-            None,   # None → default ThreadPoolExecutor
-            lambda: self.retriever.retrieve(question, filters=filters),
-        )
+        # Retrieval goes through the coalescer: concurrent in-flight
+        # queries share one encode + one batched FAISS search
+        context = await self._coalescer.retrieve(question, filters=filters)
 
         if retrieval_span:
             try:
@@ -77,7 +170,7 @@ class AsyncRAGPipeline(RAGPipeline):
             if trace:
                 try:
                     trace.update(output={"answer": "No relevant information found."})
-                    langfuse.flush()
+                    flush_async()
                 except Exception as e:
                     logger.warning(f"langfuse_flush_failed: {e}")
             return "No relevant information found."
@@ -108,7 +201,7 @@ class AsyncRAGPipeline(RAGPipeline):
             except Exception as e:
                 logger.warning(f"langfuse_generation_span_end_failed: {e}")
 
-        # Update trace with final answer and flush immediately
+        # Update trace with final answer; flush happens off the event loop
         if trace:
             try:
                 trace.update(output={"answer": answer})
@@ -119,8 +212,8 @@ class AsyncRAGPipeline(RAGPipeline):
                     value=drift_score,
                     comment="high drift" if drift_score > 0.5 else "normal",
                 )
-                langfuse.flush()
+                flush_async()
             except Exception as e:
                 logger.warning(f"langfuse_flush_failed: {e}")
 
-        return answer
\ No newline at end of file
+        return self._cache_put(self._answer_cache, cache_key, answer)
\ No newline at end of file
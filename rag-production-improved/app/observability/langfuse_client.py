@@ -1,3 +1,6 @@
+# Small thread pool so flushes never block the request path
+from concurrent.futures import ThreadPoolExecutor
+
 from app.config.settings import (
     LANGFUSE_PUBLIC_KEY,
     LANGFUSE_SECRET_KEY,
@@ -28,3 +31,23 @@ if LANGFUSE_ENABLED:
         langfuse = None
 else:
     logger.warning("langfuse_disabled: no keys configured")
+
+
+# Dedicated executor for trace uploads — trace()/span()/update() only
+# enqueue events in the SDK's in-memory buffer, but flush() does HTTP I/O
+# and must never run on the request path
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="langfuse")
+
+
+def flush_async():
+    """Fire-and-forget flush of buffered Langfuse events."""
+    if langfuse is None:
+        return
+
+    def _flush():
+        try:
+            langfuse.flush()
+        except Exception as e:
+            logger.warning(f"langfuse_async_flush_failed: {e}")
+
+    _executor.submit(_flush)
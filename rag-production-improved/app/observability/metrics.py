@@ -1,15 +1,43 @@
 import time
+import logging
+import threading
+from collections import deque
 from contextlib import contextmanager
 from app.observability.logger import logger
 
+# Ring buffer of (stage, elapsed_ns) samples. deque.append is atomic and
+# lock-free under the GIL, and maxlen bounds memory if the flusher stalls.
+_samples = deque(maxlen=65536)
+
+# How often the background thread drains the buffer into the logger
+_FLUSH_INTERVAL_S = 0.1
+
+
+def _flush_loop():
+    while True:
+        time.sleep(_FLUSH_INTERVAL_S)
+        while _samples:
+            stage, elapsed_ns = _samples.popleft()
+            logger.info(
+                "latency",
+                extra={"stage": stage, "latency_ms": round(elapsed_ns / 1e6, 2)},
+            )
+
+
+_flusher = threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True)
+_flusher.start()
+
+
 @contextmanager
 def track(stage: str):
-    start = time.perf_counter()
-    yield
-    elapsed = (time.perf_counter() - start) * 1000
-    logger.info(
-        "latency",
-        extra={"stage": stage, "latency_ms": round(elapsed, 2)},
-    )
-
+    # When INFO logging is off, pay nothing at all on the hot path
+    if not logger.isEnabledFor(logging.INFO):
+        yield
+        return
 
+    # monotonic_ns: integer clock, no float conversion per span
+    start = time.monotonic_ns()
+    yield
+    # Only an integer subtract + deque append here; LogRecord construction
+    # happens on the background flusher thread
+    _samples.append((stage, time.monotonic_ns() - start))
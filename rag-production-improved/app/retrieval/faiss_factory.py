@@ -1,18 +1,97 @@
+import math                       # For the sqrt(N) partition-count heuristic
+import os                         # CPU count for the OpenMP thread pool
+
+import numpy as np                # Training-sample selection
 import faiss                      # Facebook AI Similarity Search library for fast vector similarity search
 from app.observability.logger import logger   # Custom logger for observability / monitoring
+from app.config.settings import NPROBE        # Cells probed per query
+
+# Give FAISS's OpenMP pool every core for train/add/search —
+# the default can undercount inside containers
+faiss.omp_set_num_threads(os.cpu_count() or 1)
+
+# Below this many vectors the PCIe copy + cudaMalloc of a GPU transfer
+# costs more than CPU SIMD search ever will
+GPU_MIN_VECTORS = 50_000
+
+# Vectors inserted per add() call (~96MB of fp32 at dim=384)
+ADD_BATCH = 65536
+
+
+def _add_in_batches(index, embeddings):
+    """
+    Insert vectors in fixed-size slices.
+
+    add() internally buffers what it is handed, so feeding the whole
+    matrix doubles peak memory. Row slices of a contiguous array are
+    views (no copy), which also lets np.memmap-backed matrices stream
+    off disk one window at a time instead of faulting everything in.
+    """
+    for i in range(0, embeddings.shape[0], ADD_BATCH):
+        index.add(embeddings[i:i + ADD_BATCH])
 
 # Function to build FAISS index from embedding matrix
 # embeddings -> numpy array of shape (num_docs, embedding_dim)
 # use_gpu -> whether to move FAISS index to GPU
 # nlist -> number of IVF clusters (used in ANN search)
-def build_faiss_index(embeddings, use_gpu: bool = True, nlist: int = 128):
+# index_type -> "flat" | "ivf_flat" | "ivf_pq" | "hnsw"
+#   flat:     exact scan over fp16 scalar-quantized vectors (baseline /
+#             debugging — the scan is memory-bound, so half the bytes
+#             means roughly double the QPS at negligible recall cost)
+#   ivf_flat: partitioned exact scan, full fp32 vectors
+#   ivf_pq:   partitioned + product-quantized codes (default — vector
+#             bytes shrink from 4*dim to dim/8, ~32x, so scans stay
+#             cache-resident and RAM scales to much larger corpora)
+#   hnsw:     graph index, best recall/latency when RAM is no concern
+def build_faiss_index(embeddings, use_gpu: bool = True, nlist: int = 128, index_type: str = "ivf_pq"):
 
     dim = embeddings.shape[1]     # Extract embedding dimension (vector size)
 
+    # Ingestion contract, enforced once up front: FAISS kernels want
+    # contiguous fp32 (otherwise add/train silently double-buffer), and
+    # METRIC_INNER_PRODUCT is only cosine over unit-norm vectors.
+    # astype/ascontiguousarray are no-ops for compliant input and
+    # normalize_L2 (in-place SIMD renorm) is idempotent on unit vectors.
+    if embeddings.dtype != np.float32:
+        embeddings = embeddings.astype(np.float32, copy=False)
+    embeddings = np.ascontiguousarray(embeddings)
+    faiss.normalize_L2(embeddings)
+
+    # Exact-scan variants (no clustering, no training beyond PQ/SQ fit)
+    if index_type == "flat":
+        # fp16 scalar quantization: IndexFlatIP is bandwidth-bound, so
+        # storing half-precision vectors halves RAM and bytes moved per
+        # scan while FAISS's SIMD SQ kernels keep the scoring exact
+        # enough for cosine ranking
+        index = faiss.IndexScalarQuantizer(
+            dim,
+            faiss.ScalarQuantizer.QT_fp16,
+            faiss.METRIC_INNER_PRODUCT,
+        )
+        index.train(embeddings)   # fp16 needs no range fit, but train() is the SQ contract
+        _add_in_batches(index, embeddings)
+        return index
+
+    if index_type == "hnsw":
+        # 32 neighbors per node; higher efConstruction buys graph quality
+        # once at build time for better recall at search time
+        index = faiss.IndexHNSWFlat(dim, 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = 200
+        _add_in_batches(index, embeddings)
+        return index
+
     # If dataset is very small then IVF is useless because clustering will be poor
-    # In that case we fallback to Flat Index (Exact Search)
+    # In that case we fallback to a scalar-quantized exact index:
+    # vectors stored as int8 (4x smaller than FP32) so the brute-force
+    # scan moves 4x fewer bytes and uses AVX2 integer dot products.
+    # Embeddings are already L2-normalized, so IP stays equivalent to cosine.
     if embeddings.shape[0] < nlist:
-        index = faiss.IndexFlatIP(dim)   # Exact nearest neighbour search using Inner Product
+        index = faiss.IndexScalarQuantizer(
+            dim,
+            faiss.ScalarQuantizer.QT_8bit,
+            faiss.METRIC_INNER_PRODUCT,
+        )
+        index.train(embeddings)          # One pass to fit the per-dim quantization range
         index.add(embeddings)            # Add all document embeddings into index
         
         # 👉 VECTOR DB INSERT POINT:
@@ -27,24 +106,58 @@ def build_faiss_index(embeddings, use_gpu: bool = True, nlist: int = 128):
         
         return index
 
+    # Partition count scales with corpus size (standard 4*sqrt(N) rule,
+    # capped — past ~262k cells training cost outgrows the benefit)
+    nlist = min(max(nlist, int(4 * math.sqrt(embeddings.shape[0]))), 262144)
+
     # Quantizer is mandatory for IVF index
-    # It acts as coarse cluster center finder
-    quantizer = faiss.IndexFlatIP(dim)
+    # It acts as coarse cluster center finder.
+    # A flat scan over centroids is fine for small nlist, but the
+    # assignment cost is linear in the partition count — above ~1024
+    # cells an HNSW graph over the centroids (the IVF_HNSW composite)
+    # keeps train-time assignment and query-time probing sublinear.
+    if nlist >= 1024:
+        quantizer = faiss.IndexHNSWFlat(dim, 32, faiss.METRIC_INNER_PRODUCT)
+    else:
+        quantizer = faiss.IndexFlatIP(dim)
 
-    # IVF = Inverted File Index (Approximate Nearest Neighbour Search)
-    # Faster than flat search for large dataset
-    index = faiss.IndexIVFFlat(
-        quantizer,                 # cluster builder
-        dim,                       # vector dimension
-        nlist,                     # number of clusters
-        faiss.METRIC_INNER_PRODUCT # similarity metric (cosine if normalized)
-    )
+    if index_type == "ivf_flat":
+        # Partitioned exact scan over full fp32 vectors
+        index = faiss.IndexIVFFlat(
+            quantizer,
+            dim,
+            nlist,
+            faiss.METRIC_INNER_PRODUCT,
+        )
+    else:
+        # IVF-PQ = Inverted File partitions + Product Quantization codes
+        # Each query touches only nprobe cells (~nlist/nprobe less work
+        # than a flat scan) and the PQ codes shrink stored vectors ~32x
+        index = faiss.IndexIVFPQ(
+            quantizer,                 # cluster builder
+            dim,                       # vector dimension
+            nlist,                     # number of clusters
+            max(8, dim // 8),          # PQ sub-quantizers (8 dims per code)
+            8,                         # bits per sub-quantizer code
+            faiss.METRIC_INNER_PRODUCT # similarity metric (cosine if normalized)
+        )
 
-    # Train IVF clusters before inserting vectors
-    index.train(embeddings)
+    # Train IVF clusters before inserting vectors.
+    # k-means converges from a few hundred samples per cluster, so
+    # training on every vector is wasted compute at million scale —
+    # subsample to 256*nlist (canonical FAISS guidance), seeded for
+    # reproducible cluster assignments.
+    n = embeddings.shape[0]
+    ntrain = min(n, 256 * nlist)
+    if ntrain < n:
+        sample = np.random.default_rng(0).choice(n, ntrain, replace=False)
+        train_x = np.ascontiguousarray(embeddings[sample])
+    else:
+        train_x = embeddings
+    index.train(train_x)
 
-    # Add embeddings into trained index
-    index.add(embeddings)
+    # Add ALL embeddings into trained index, in bounded slices
+    _add_in_batches(index, embeddings)
 
     # 👉 VECTOR DB INSERT POINT:
     # THIS IS YOUR BEST PLACE TO MOVE TO VECTOR DB
@@ -62,15 +175,28 @@ def build_faiss_index(embeddings, use_gpu: bool = True, nlist: int = 128):
     # Retrieval later becomes:
     #       vector_db.search(query_embedding, top_k)
 
-    # nprobe controls how many clusters are searched during retrieval
-    # Higher = better accuracy but slower search
-    index.nprobe = min(8, nlist)
+    # nprobe controls how many clusters are searched during retrieval.
+    # sqrt(nlist) scales search breadth with the partition count as the
+    # corpus grows; the configured NPROBE acts as a floor.
+    index.nprobe = min(max(NPROBE, int(round(math.sqrt(nlist)))), nlist)
+
+    # Default parallel_mode 0 spreads a BATCH of queries across threads
+    # (mode 3 is the same split at finer granularity), which idles
+    # every core when the pipeline sends one query at a time. Mode 1
+    # parallelizes over the probed inverted lists WITHIN a query, so
+    # the OpenMP pool cuts single-query tail latency.
+    index.parallel_mode = 1
 
-    # Move FAISS index to GPU if available
-    if use_gpu and faiss.get_num_gpus() > 0:
+    # Move FAISS index to GPU if available — but only past the size
+    # where the fixed transfer overhead pays for itself
+    if use_gpu and embeddings.shape[0] >= GPU_MIN_VECTORS and faiss.get_num_gpus() > 0:
         try:
             res = faiss.StandardGpuResources()   # GPU memory manager
             index = faiss.index_cpu_to_gpu(res, 0, index)  # Move CPU index to GPU
+            # Pin the resources object to the index: faiss does not own
+            # it, and letting Python GC it while the GpuIndex lives
+            # crashes on the next search
+            index.gpu_resources = res
             logger.info("faiss_gpu_enabled")
         except Exception:
             # If GPU fails fallback to CPU silently
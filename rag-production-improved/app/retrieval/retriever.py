@@ -1,12 +1,21 @@
 # Used for thread-safe access to FAISS index & in-memory docs
 import threading
 
+# sqrt for the nprobe-scaling rule shared with the index factory
+import math
+
+# C-level comparison functions for compiled metadata predicates
+import operator
+
 # FAISS vector similarity search library (local in-memory vector DB)
 import faiss
 
 # Numpy for centroid computation
 import numpy as np
 
+# Torch is only touched here to size its intra-op thread pool
+import torch
+
 # Type hints for readability
 from typing import List, Dict, Optional
 
@@ -20,30 +29,320 @@ from app.retrieval.faiss_factory import build_faiss_index
 # Structured logger for observability
 from app.observability.logger import logger
 
+# Thresholds for the binary coarse-search + rerank path, IVF search breadth
+from app.config.settings import (
+    BINARY_RERANK_MIN_DOCS,
+    BINARY_OVERSAMPLE,
+    NPROBE,
+    TORCH_NUM_THREADS,
+)
+
+
+# Optional SimSIMD: hand-tuned AVX-512/NEON similarity kernels with far
+# less per-call overhead than a NumPy dot on a single 384-d vector
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+
+def _binarize(embeddings):
+    """Pack sign bits of an (N, d) float matrix into (N, d/8) uint8 codes."""
+    return np.packbits(embeddings > 0, axis=1)
+
+
+# Sentinel for "metadata key absent" — every filter rejects it
+_MISS = object()
+
+# Max entries for the query-embedding and retrieval-result caches
+# (cleared wholesale at capacity, same policy as the answer cache)
+_QUERY_CACHE_SIZE = 4096
+
+
+def _freeze(value):
+    """Recursively convert a filters structure into a hashable cache key."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+# Comparison behind each range/logical operator, resolved ONCE when a
+# filters dict is compiled instead of via seven '"$op" in value' tests
+# per key per candidate document
+_FILTER_OPS = {
+    "$gte": operator.ge,
+    "$lte": operator.le,
+    "$gt": operator.gt,
+    "$lt": operator.lt,
+    "$eq": operator.eq,
+    "$ne": operator.ne,
+    "$in": lambda v, allowed: v in allowed,
+}
+
+# Used for dict-valued filters that carry no recognized operator:
+# the key-existence requirement still applies
+_KEY_EXISTS = lambda v, _: True
+
+# Adaptive over-fetch for filtered search: k never exceeds this many
+# multiples of top_k, and the post-filter pass rate per filter
+# signature is tracked as an exponentially weighted moving average
+_OVERFETCH_MAX_MULT = 10
+_PASS_RATE_EWMA_ALPHA = 0.3
+
+# Integer codes for the columnar-path operators and the NumPy ufunc for
+# each code ($in is excluded — it stays on the np.isin path)
+_OP_CODES = {"$gte": 0, "$lte": 1, "$gt": 2, "$lt": 3, "$eq": 4, "$ne": 5}
+_CODE_UFUNCS = (np.greater_equal, np.less_equal, np.greater, np.less, np.equal, np.not_equal)
+
+# The fused kernel only pays off when the candidate set is large enough
+# to amortize its launch; below this the ufunc masks win
+_KERNEL_MIN_CAND = 1024
+
+# Optional numba: fuses all range comparisons into ONE parallel pass
+# over the gathered candidate columns, instead of one ufunc dispatch
+# (and one temporary mask) per operator. Same optional-dependency
+# treatment as in the chunker — absence simply keeps the ufunc path.
+try:
+    import numba
+
+    @numba.njit(cache=True, parallel=True)
+    def _mask_kernel(cols, ops, bounds, mask):   # pragma: no cover - jitted
+        # cols: (m, n) gathered column values, one row per condition
+        for i in numba.prange(cols.shape[1]):
+            ok = True
+            for j in range(cols.shape[0]):
+                v = cols[j, i]
+                b = bounds[j]
+                o = ops[j]
+                if o == 0:
+                    ok = v >= b
+                elif o == 1:
+                    ok = v <= b
+                elif o == 2:
+                    ok = v > b
+                elif o == 3:
+                    ok = v < b
+                elif o == 4:
+                    ok = v == b
+                else:
+                    ok = v != b
+                if not ok:
+                    break
+            mask[i] = ok
+except ImportError:
+    numba = None
+    _mask_kernel = None
+
+
+def _build_meta_columns(metadata):
+    """
+    Column-oriented view of the numeric metadata keys.
+
+    metadata is stored row-wise (one dict per chunk), so range filters
+    walk dicts one document at a time. Keys that hold a plain number in
+    EVERY row are materialized once as a float64 column; filters over
+    them become vectorized masks. Keys that are missing somewhere, or
+    non-numeric, are simply not materialized and keep the per-row path.
+    """
+    if not metadata:
+        return {}
+
+    cols = {}
+    for key, first in metadata[0].items():
+        if isinstance(first, bool) or not isinstance(first, (int, float)):
+            continue
+        values = np.empty(len(metadata), dtype=np.float64)
+        for i, row in enumerate(metadata):
+            v = row.get(key)
+            if isinstance(v, bool) or not isinstance(v, (int, float)):
+                break
+            values[i] = v
+        else:
+            cols[key] = values
+    return cols
+
+
+def _columnar_mask(meta_cols, cand, filters):
+    """
+    Evaluate `filters` over candidate ids as boolean masks.
+
+    Returns the combined mask, or None when any key or operator is not
+    representable on the materialized columns (caller falls back to the
+    compiled per-row predicate).
+    """
+    # Flatten the filters into (column, operator, bound) conditions so
+    # both evaluation paths below can consume them
+    conditions = []
+    in_conditions = []
+    for key, value in filters.items():
+        col = meta_cols.get(key)
+        if col is None:
+            return None
+        if isinstance(value, dict):
+            for name, bound in value.items():
+                if name == "$in":
+                    in_conditions.append((col, bound))
+                    continue
+                code = _OP_CODES.get(name)
+                if code is None or isinstance(bound, bool) or not isinstance(bound, (int, float)):
+                    return None
+                conditions.append((col, code, bound))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            # Direct equality filter
+            conditions.append((col, _OP_CODES["$eq"], value))
+        else:
+            # Equality against a non-numeric value on a numeric column
+            return None
+
+    if (
+        _mask_kernel is not None
+        and conditions
+        and cand.shape[0] >= _KERNEL_MIN_CAND
+    ):
+        # Fused path: gather each condition's column once, then a single
+        # JIT-compiled parallel pass evaluates every comparison with
+        # short-circuiting — no per-operator temporaries
+        gathered = np.empty((len(conditions), cand.shape[0]), dtype=np.float64)
+        for j, (col, _, _) in enumerate(conditions):
+            gathered[j] = col[cand]
+        ops = np.array([code for _, code, _ in conditions], dtype=np.int8)
+        bounds = np.array([bound for _, _, bound in conditions], dtype=np.float64)
+        mask = np.empty(cand.shape[0], dtype=np.bool_)
+        _mask_kernel(gathered, ops, bounds, mask)
+    else:
+        # Ufunc path: one SIMD comparison per operator
+        mask = np.ones(cand.shape[0], dtype=bool)
+        for col, code, bound in conditions:
+            mask &= _CODE_UFUNCS[code](col[cand], bound)
+
+    for col, allowed in in_conditions:
+        mask &= np.isin(col[cand], list(allowed))
+    return mask
+
+
+def _search_params(index, sel):
+    """
+    ID-selector search parameters of the concrete type `index` expects.
+
+    FAISS dynamic_casts the params argument: IndexIVF::search requires
+    SearchParametersIVF and IndexHNSW requires SearchParametersHNSW —
+    both throw on the base class. Flat and SQ-flat indexes take the
+    base SearchParameters. The per-index tuning (nprobe / efSearch) is
+    carried over so a selector search probes as widely as a plain one.
+    """
+    if isinstance(index, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=sel, nprobe=index.nprobe)
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=sel, efSearch=index.hnsw.efSearch)
+    return faiss.SearchParameters(sel=sel)
+
+
+def _compile_filters(filters: dict):
+    """
+    Compile a filters dict into a per-document predicate.
+
+    The dict is walked exactly once, resolving every operator to a
+    C-level comparison; the returned closure then runs a flat loop of
+    (key, op, bound) checks per document. Candidate lists are up to
+    top_k*3 long, so the interpreted dict-walk cost is paid per query
+    instead of per candidate.
+    """
+    checks = []
+    for key, value in filters.items():
+        if isinstance(value, dict):
+            ops = [(op, bound) for name, bound in value.items()
+                   for op in (_FILTER_OPS.get(name),) if op is not None]
+            if not ops:
+                checks.append((key, _KEY_EXISTS, None))
+            for op, bound in ops:
+                checks.append((key, op, bound))
+        else:
+            # Direct equality filter
+            checks.append((key, operator.eq, value))
+
+    def predicate(meta: dict) -> bool:
+        for key, op, bound in checks:
+            v = meta.get(key, _MISS)
+            if v is _MISS or not op(v, bound):
+                return False
+        return True
+
+    return predicate
+
 
 class Retriever:
 
-    def __init__(self, model_name: str, top_k: int, enable_metadata: bool = True):
+    def __init__(self, model_name: str, top_k: int, enable_metadata: bool = True, batch_size: int = 64):
 
         # Load embedding model (e.g. all-MiniLM-L6-v2)
         # Used for converting documents & query → vectors
-        self.model = SentenceTransformer(model_name)
+        # (SentenceTransformer places itself on GPU when one is available)
+        #
+        # Single-query encodes are dominated by framework overhead, not
+        # math, so prefer the ONNX Runtime backend: try the pre-quantized
+        # int8 graph first, then the plain ONNX export, and only fall
+        # back to PyTorch when the ORT stack is unavailable. The fast
+        # (Rust) tokenizer is requested explicitly on every path.
+        self.model = None
+        for kwargs in (
+            {"backend": "onnx", "model_kwargs": {"file_name": "model_qint8.onnx"}},
+            {"backend": "onnx"},
+        ):
+            try:
+                self.model = SentenceTransformer(
+                    model_name,
+                    tokenizer_kwargs={"use_fast": True},
+                    **kwargs,
+                )
+                logger.info("embedder_backend", extra={"backend": "onnx", **kwargs.get("model_kwargs", {})})
+                break
+            except Exception:
+                continue
+        if self.model is None:
+            self.model = SentenceTransformer(model_name, tokenizer_kwargs={"use_fast": True})
+
+        # Under request-parallel serving, concurrent single-sentence
+        # encodes thrash a shared intra-op pool; optionally pin it
+        # (0 = keep torch's default, tune via TORCH_NUM_THREADS)
+        if TORCH_NUM_THREADS > 0:
+            torch.set_num_threads(TORCH_NUM_THREADS)
 
         # Number of top similar results to return
         self.top_k = top_k
 
+        # Encoder batch size for index builds — the dominant cold-start
+        # cost is embedding, and bigger batches keep the device busy
+        self.batch_size = batch_size
+
         # Enable metadata filtering during retrieval
         self.enable_metadata = enable_metadata
 
         # FAISS index (stores vectors only)
         self.index = None
 
+        # Optional binary sign-bit index for large corpora:
+        # Hamming coarse search (32x smaller payload) + exact rerank
+        self.binary_index = None
+
+        # Full-precision vectors kept for the rerank stage
+        self.candidate_vectors = None
+
+        # Document embeddings cached from the last build(), stored as
+        # fp16 (half the RAM, plenty of precision for a mean) so
+        # compute_centroid never has to re-encode the whole corpus
+        self._embeddings_f16 = None
+
         # In-memory document storage (FAISS does NOT store text)
         self.documents = []
 
         # In-memory metadata storage (FAISS does NOT store metadata)
         self.metadata = []
 
+        # Columnar (SoA) view of numeric metadata keys for vectorized
+        # filtering; rebuilt whenever metadata is swapped
+        self._meta_cols = {}
+
         # Centroid of all document embeddings
         # Used for semantic drift monitoring
         self.centroid = None
@@ -51,6 +350,27 @@ class Retriever:
         # Lock for safe concurrent reads/writes in FastAPI
         self._lock = threading.Lock()
 
+        # Compiled filter predicates keyed by id(filters); the filters
+        # object itself is stored alongside so its id cannot be recycled
+        # while the entry lives. Cleared at capacity like the answer cache.
+        self._filter_cache = {}
+
+        # EWMA of the post-filter pass rate per filter-key signature,
+        # used to size the over-fetch k adaptively
+        self._pass_rate = {}
+
+        # Queries repeat (follow-ups, autocomplete, eval loops), so the
+        # encoder forward pass and the final result list are both
+        # memoized; swapped for fresh dicts whenever the corpus changes
+        self._encode_cache = {}
+        self._result_cache = {}
+
+        # Set on the first search that proves this FAISS build / index
+        # combination rejects ID selectors, so later filtered queries
+        # skip straight to the over-fetch path without paying for a
+        # full-corpus mask first
+        self._selector_unsupported = False
+
         # ------------------------------------------------------
         # 🚀 FUTURE VECTOR DB INSERTION POINT
         # Instead of FAISS you can initialize:
@@ -64,25 +384,65 @@ class Retriever:
 
     def build(self, documents: list[str], metadata: list[dict] = None):
 
-        # Convert documents → embeddings (vector representation)
-        embeddings = self.model.encode(
-            documents,
-            batch_size=64,
-            normalize_embeddings=True,   # cosine similarity support
-            convert_to_numpy=True,
-            show_progress_bar=True,
-        ).astype("float32")
+        # Convert documents → embeddings (vector representation).
+        # On CUDA the bulk encode runs under fp16 autocast: tensor-core
+        # math at half the time and bandwidth for the corpus pass, while
+        # the weights — and therefore the single-query retrieve path —
+        # stay full precision. sentence-transformers already length-sorts
+        # internally (smart batching), so raising batch_size is enough.
+        def _encode_corpus():
+            return self.model.encode(
+                documents,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=True,
+            )
+
+        if torch.cuda.is_available():
+            with torch.autocast(device_type="cuda", dtype=torch.float16):
+                raw = _encode_corpus()
+        else:
+            raw = _encode_corpus()
+
+        # asarray, not astype: the model already hands back contiguous
+        # fp32, and astype would copy the full corpus matrix regardless
+        embeddings = np.asarray(raw, dtype=np.float32)
+        assert embeddings.dtype == np.float32  # FAISS ingestion contract
+
+        # Ingestion invariant: stored vectors are unit-norm, so inner
+        # product on the index IS cosine similarity. In-place normalize
+        # (no reallocation) — per-query we only normalize the query.
+        faiss.normalize_L2(embeddings)
 
         # Build FAISS index from embeddings
         # FAISS stores ONLY vectors, not text or metadata
         index = build_faiss_index(embeddings)
 
+        # For large corpora, also build a binary sign-bit index:
+        # Hamming search over packed bits is ~32x cheaper per vector,
+        # and the FP32 matrix is kept for exact rerank of candidates
+        binary_index = None
+        candidate_vectors = None
+        if embeddings.shape[0] >= BINARY_RERANK_MIN_DOCS and embeddings.shape[1] % 8 == 0:
+            binary_index = faiss.IndexBinaryFlat(embeddings.shape[1])
+            binary_index.add(_binarize(embeddings))
+            candidate_vectors = embeddings
+
         # Thread-safe write to retriever state
         with self._lock:
 
             # Store FAISS index in memory
             self.index = index
 
+            # Binary coarse index + rerank vectors (None for small corpora)
+            self.binary_index = binary_index
+            self.candidate_vectors = candidate_vectors
+
+            # Keep the (normalized) embeddings for centroid computation —
+            # re-encoding the corpus is by far the most expensive way to
+            # recover vectors we already have in hand
+            self._embeddings_f16 = embeddings.astype(np.float16, copy=False)
+
             # Store original documents separately
             # Needed because FAISS only returns vector IDs
             self.documents = documents
@@ -90,6 +450,17 @@ class Retriever:
             # Store metadata separately
             self.metadata = metadata if metadata else []
 
+            # Columnar view of the numeric metadata keys
+            self._meta_cols = _build_meta_columns(self.metadata)
+
+            # Selectivity stats and memoized queries belong to the old corpus
+            self._pass_rate = {}
+            self._encode_cache = {}
+            self._result_cache = {}
+
+            # New index type may (not) support ID selectors — re-probe
+            self._selector_unsupported = False
+
         # ------------------------------------------------------
         # 🚀 VECTOR DB SHOULD BE ADDED HERE (INSTEAD OF ABOVE)
         #
@@ -125,12 +496,12 @@ class Retriever:
         """
         Calculates the global semantic center of the current knowledge base.
 
-        This function generates embeddings for all loaded documents and computes 
-        their arithmetic mean (centroid). This centroid serves as the 'anchor' 
-        representing the core domain of the RAG system. 
-        
+        Computes the arithmetic mean (centroid) of the document embeddings.
+        This centroid serves as the 'anchor' representing the core domain
+        of the RAG system.
+
         Note:
-            Must be executed after initial index construction or following 
+            Must be executed after initial index construction or following
             significant knowledge base updates to ensure the baseline remains valid.
 
         """
@@ -139,15 +510,39 @@ class Retriever:
             logger.warning("compute_centroid_skipped: no documents loaded")
             return
 
-        # Encode all documents to get their embeddings
-        embeddings = self.model.encode(
-            self.documents,
-            normalize_embeddings=True,
-            convert_to_numpy=True,
-        ).astype("float32")
+        if self._embeddings_f16 is not None:
+            # Reuse the embeddings cached during build() — skipping the
+            # second full-corpus encode, which dominates this call
+            embeddings = self._embeddings_f16
+        else:
+            # Index was loaded from disk, so no cached embeddings exist.
+            # Before falling back to a full corpus encode, try reading
+            # the vectors straight back out of FAISS — flat and IVF-Flat
+            # indexes reconstruct exactly, with no model inference at all
+            embeddings = None
+            index = self.index
+            if index is not None and hasattr(index, "reconstruct_n"):
+                try:
+                    embeddings = index.reconstruct_n(0, index.ntotal)
+                except Exception:
+                    # IVF variants without a direct map (and some PQ
+                    # wrappers) refuse to reconstruct — encode instead
+                    embeddings = None
+            if embeddings is None:
+                # Last resort: re-encode (the slow path, once per load)
+                embeddings = np.asarray(
+                    self.model.encode(
+                        self.documents,
+                        normalize_embeddings=True,
+                        convert_to_numpy=True,
+                    ),
+                    dtype=np.float32,
+                )
 
         # Average of all embeddings = knowledge centroid
-        self.centroid = np.mean(embeddings, axis=0)
+        # (accumulate in fp32 even for fp16 input; contiguous fp32 so the
+        # per-query similarity kernel gets an aligned buffer with no copy)
+        self.centroid = np.ascontiguousarray(embeddings.mean(axis=0, dtype=np.float32))
 
         logger.info(
             "centroid_computed",
@@ -173,20 +568,25 @@ class Retriever:
                 - 0.4 - 1.0: High Risk (Potential hallucination/OOD)
         """
 
+        # Snapshot the centroid reference once; the encode below runs
+        # lock-free and must not see a mid-call swap
+        centroid = self.centroid
+
         # If centroid not computed yet return 0 (no drift info)
-        if self.centroid is None:
+        if centroid is None:
             return 0.0
 
-        # Embed the query
-        q = self.model.encode(
-            [query],
-            normalize_embeddings=True,
-            convert_to_numpy=True,
-        ).astype("float32")[0]
+        # Embed the query (shares the memoized encode with retrieve(),
+        # so drift + retrieval for the same question encode once)
+        q = self._encode_query(query)[0]
 
         # Cosine similarity between query and centroid
         # (1.0 = perfect match, 0.0 = completely different)
-        similarity = float(np.dot(q, self.centroid))
+        if simsimd is not None:
+            # simsimd.cosine returns the DISTANCE (1 - cos)
+            similarity = 1.0 - float(simsimd.cosine(q, centroid))
+        else:
+            similarity = float(np.dot(q, centroid))
 
         # Drift = inverse of similarity
         drift = 1.0 - similarity
@@ -198,56 +598,211 @@ class Retriever:
 
         # Used when loading FAISS index from disk
         with self._lock:
+            # Restore the tuned search breadth on IVF indexes — same
+            # sqrt(nlist) rule as the factory, with NPROBE as a floor,
+            # so a warm start probes as many cells as a cold build
+            if hasattr(index, "nprobe"):
+                nlist = getattr(index, "nlist", 0)
+                if nlist:
+                    index.nprobe = min(
+                        max(NPROBE, int(round(math.sqrt(nlist)))), nlist
+                    )
+                else:
+                    index.nprobe = NPROBE
             self.index = index
             self.documents = documents
             self.metadata = metadata if metadata else []
-
+            self._meta_cols = _build_meta_columns(self.metadata)
+            self._pass_rate = {}
+            self._encode_cache = {}
+            self._result_cache = {}
+            self._selector_unsupported = False
+
+            # The binary index is built in-memory only, so a disk load
+            # falls back to single-stage search
+            self.binary_index = None
+            self.candidate_vectors = None
+
+            # No cached embeddings either — compute_centroid will encode
+            self._embeddings_f16 = None
+
+
+    def _encode_query(self, query: str) -> np.ndarray:
+        """Encode one query to a (1, d) unit-norm fp32 vector, memoized."""
+        q = self._encode_cache.get(query)
+        if q is None:
+            # asarray instead of astype: sentence-transformers already
+            # returns contiguous fp32, so this is a no-op view rather
+            # than an unconditional copy (astype copies even same-dtype)
+            q = np.asarray(
+                self.model.encode([query], convert_to_numpy=True),
+                dtype=np.float32,
+            )
+            faiss.normalize_L2(q)
+            if len(self._encode_cache) >= _QUERY_CACHE_SIZE:
+                self._encode_cache.clear()
+            self._encode_cache[query] = q
+        return q
 
     def retrieve(self, query: str, filters: dict = None) -> list[str]:
 
+        # Serve repeated (query, filters) pairs straight from cache —
+        # skips the encoder forward pass AND the index search entirely
+        result_key = (query, _freeze(filters) if filters else None)
+        cached = self._result_cache.get(result_key)
+        if cached is not None:
+            return cached
+
+        # RCU-style snapshot: the lock only guards grabbing consistent
+        # references. build()/load_index() swap all of them atomically
+        # under the same lock, so encode + search + filtering can run
+        # lock-free (inference releases the GIL) and concurrent requests
+        # no longer serialize on one another.
         with self._lock:
-
-            # If index not built yet
-            if self.index is None:
-                return []
-
-            # Convert query → embedding vector
-            q = self.model.encode(
-                [query],
-                normalize_embeddings=True,
-                convert_to_numpy=True,
-            ).astype("float32")
-
-            # If metadata filters are used,
-            # search more results initially then filter later
-            k = self.top_k * 3 if filters and self.metadata else self.top_k
-
-            # FAISS similarity search
-            # returns distances + vector IDs
-            _, ids = self.index.search(q, k)
-
-            results = []
-
-            # Loop over matched vector IDs
-            for i in ids[0]:
-
-                # Ignore invalid index
-                if i >= len(self.documents):
-                    continue
-
-                # Apply metadata filtering if needed
-                if filters and self.metadata and i < len(self.metadata):
-                    if not self._matches_filters(self.metadata[i], filters):
+            index = self.index
+            binary_index = self.binary_index
+            candidate_vectors = self.candidate_vectors
+            documents = self.documents
+            metadata = self.metadata
+            meta_cols = self._meta_cols
+
+        # If index not built yet
+        if index is None:
+            return []
+
+        # Convert query → embedding vector, unit-norm (memoized)
+        q = self._encode_query(query)
+
+        # If metadata filters are used, search more results initially
+        # then filter later. Compile the predicate once (it runs per
+        # candidate) and size the over-fetch from the observed pass rate
+        # of this filter signature instead of a fixed 3x — low
+        # selectivity wastes distance computations, strict filters
+        # starve recall.
+        predicate = self._compiled_filters(filters) if filters and metadata else None
+        sig = frozenset(filters) if predicate is not None else None
+        k = self._overfetch_k(sig) if predicate is not None else self.top_k
+
+        # Hoisted loop invariants: len() is a call per iteration in
+        # bytecode, and these bound every candidate id below
+        n_docs = len(documents)
+        n_meta = len(metadata) if metadata else 0
+        top_k = self.top_k
+
+        # Pre-filter inside FAISS: when every filter key is columnar,
+        # the mask over the WHOLE corpus is a few SIMD passes, and the
+        # allowed ids go to the search as an IDSelector — FAISS then
+        # prunes during traversal, so no over-fetch, no post-filter, no
+        # retry loop. Skipped on the binary-rerank path (the Hamming
+        # coarse search has no selector support) and after the first
+        # search that proves this index rejects selectors.
+        if (
+            predicate is not None
+            and binary_index is None
+            and meta_cols
+            and n_meta >= n_docs
+            and not self._selector_unsupported
+        ):
+            mask = _columnar_mask(meta_cols, np.arange(n_docs), filters)
+            if mask is not None:
+                allowed = np.nonzero(mask)[0]
+                results = []
+                if allowed.size:
+                    sel = faiss.IDSelectorBatch(allowed.astype(np.int64))
+                    try:
+                        _, ids = index.search(
+                            q,
+                            min(top_k, int(allowed.size)),
+                            params=_search_params(index, sel),
+                        )
+                    except RuntimeError:
+                        # FAISS signals unsupported params/selectors as
+                        # RuntimeError; remember it so later queries go
+                        # straight to the over-fetch path below
+                        self._selector_unsupported = True
+                        logger.warning("faiss_id_selector_unsupported")
+                        results = None
+                    else:
+                        results = [
+                            documents[i] for i in ids[0].tolist() if 0 <= i < n_docs
+                        ]
+                if results is not None:
+                    if len(self._result_cache) >= _QUERY_CACHE_SIZE:
+                        self._result_cache.clear()
+                    self._result_cache[result_key] = results
+                    return results
+
+        k_cap = max(1, min(n_docs, top_k * _OVERFETCH_MAX_MULT))
+        first_pass = True
+
+        while True:
+
+            if binary_index is not None:
+                # Two-stage search:
+                # 1. Hamming coarse search over sign bits (oversampled)
+                # 2. Exact inner-product rerank of the candidates in FP32
+                coarse_k = min(k * BINARY_OVERSAMPLE, binary_index.ntotal)
+                _, coarse_ids = binary_index.search(_binarize(q), coarse_k)
+                candidates = coarse_ids[0]
+                scores = candidate_vectors[candidates] @ q[0]
+                ids = candidates[np.argsort(-scores)][np.newaxis, :]
+            else:
+                # FAISS similarity search
+                # returns distances + vector IDs
+                _, ids = index.search(q, k)
+
+            # Columnar fast path: when every filter key is materialized
+            # as a numeric column, the whole candidate row is filtered
+            # with a few SIMD comparisons instead of one Python
+            # predicate call per doc
+            results = None
+            if predicate is not None and meta_cols and n_meta >= n_docs:
+                cand = ids[0][ids[0] < n_docs]
+                mask = _columnar_mask(meta_cols, cand, filters)
+                if mask is not None:
+                    if first_pass and len(cand):
+                        self._observe_pass_rate(sig, int(mask.sum()), len(cand))
+                    results = [documents[i] for i in cand[mask][:top_k]]
+
+            if results is None:
+                results = []
+                examined = kept = 0
+
+                # Loop over matched vector IDs (tolist() first — Python
+                # ints iterate and compare faster than numpy scalars)
+                for i in ids[0].tolist():
+
+                    # Ignore invalid index
+                    if i >= n_docs:
                         continue
 
-                # Map FAISS vector ID → original document
-                results.append(self.documents[i])
-
-                # Stop when enough results collected
-                if len(results) >= self.top_k:
-                    break
-
-            return results
+                    # Apply metadata filtering if needed
+                    if predicate is not None and i < n_meta:
+                        examined += 1
+                        if not predicate(metadata[i]):
+                            continue
+                        kept += 1
+
+                    # Map FAISS vector ID → original document
+                    results.append(documents[i])
+
+                    # Stop when enough results collected
+                    if len(results) >= top_k:
+                        break
+
+                if first_pass and examined:
+                    self._observe_pass_rate(sig, kept, examined)
+
+            # Widen once (to the cap) when strict filters starved the
+            # result set. Growing k is thread-safe under the snapshot
+            # model, unlike mutating the shared index's nprobe mid-flight.
+            if predicate is None or len(results) >= top_k or k >= k_cap:
+                if len(self._result_cache) >= _QUERY_CACHE_SIZE:
+                    self._result_cache.clear()
+                self._result_cache[result_key] = results
+                return results
+            k = k_cap
+            first_pass = False
 
         # ------------------------------------------------------
         # 🚀 VECTOR DB VERSION SHOULD BE HERE
@@ -267,40 +822,108 @@ class Retriever:
         # ------------------------------------------------------
 
 
-    def _matches_filters(self, metadata: dict, filters: dict) -> bool:
-        """Check if metadata matches all filter criteria."""
+    def embed_batch(self, queries: List[str]) -> np.ndarray:
+        """Encode multiple queries in one forward pass -> (N, d) float32, unit-norm."""
+        q = np.asarray(
+            self.model.encode(queries, convert_to_numpy=True),
+            dtype=np.float32,
+        )
+        faiss.normalize_L2(q)
+        return q
+
+    def retrieve_batch(self, queries: List[str], filters_list: Optional[List[Dict]] = None) -> List[List[str]]:
+        """
+        Batched retrieve: one encoder forward pass and one FAISS search
+        for all queries, then the same per-query filter walk as retrieve().
+        """
+        if filters_list is None:
+            filters_list = [None] * len(queries)
 
-        for key, value in filters.items():
+        # Same snapshot discipline as retrieve(): lock only long enough
+        # to take consistent references, then work lock-free
+        with self._lock:
+            index = self.index
+            documents = self.documents
+            metadata = self.metadata
+            meta_cols = self._meta_cols
 
-            # Metadata key must exist
-            if key not in metadata:
-                return False
+        if index is None:
+            return [[] for _ in queries]
 
-            meta_value = metadata[key]
-
-            # Handle range / logical filters
-            if isinstance(value, dict):
-
-                if "$gte" in value and meta_value < value["$gte"]:
-                    return False
-                if "$lte" in value and meta_value > value["$lte"]:
-                    return False
-                if "$gt" in value and meta_value <= value["$gt"]:
-                    return False
-                if "$lt" in value and meta_value < value["$lt"]:
-                    return False
-                if "$eq" in value and meta_value != value["$eq"]:
-                    return False
-                if "$ne" in value and meta_value == value["$ne"]:
-                    return False
-                if "$in" in value and meta_value not in value["$in"]:
-                    return False
+        q = self.embed_batch(queries)
 
-            else:
-                # Direct equality filter
-                if meta_value != value:
-                    return False
+        # Over-fetch when any query filters, so all rows have headroom
+        any_filters = any(f for f in filters_list) and bool(metadata)
+        k = self.top_k * 3 if any_filters else self.top_k
 
-        return True
+        _, ids = index.search(q, k)
+
+        # Hoisted invariants, as in retrieve()
+        n_docs = len(documents)
+        n_meta = len(metadata) if metadata else 0
+        top_k = self.top_k
+
+        batch_results = []
+        for row, filters in zip(ids, filters_list):
+            predicate = self._compiled_filters(filters) if filters and metadata else None
+
+            # Same columnar fast path as retrieve()
+            if predicate is not None and meta_cols and n_meta >= n_docs:
+                cand = row[row < n_docs]
+                mask = _columnar_mask(meta_cols, cand, filters)
+                if mask is not None:
+                    batch_results.append([documents[i] for i in cand[mask][:top_k]])
+                    continue
+
+            results = []
+            for i in row.tolist():
+                if i >= n_docs:
+                    continue
+                if predicate is not None and i < n_meta:
+                    if not predicate(metadata[i]):
+                        continue
+                results.append(documents[i])
+                if len(results) >= top_k:
+                    break
+            batch_results.append(results)
+
+        return batch_results
+
+    def _overfetch_k(self, sig) -> int:
+        """Search breadth for a filtered query, sized from observed selectivity."""
+        rate = self._pass_rate.get(sig)
+        if rate is None:
+            # No history for this signature yet — keep the 3x default
+            return self.top_k * 3
+        # Expected candidates needed, with 1.2x headroom, clamped to
+        # [top_k, _OVERFETCH_MAX_MULT * top_k]
+        k = int(self.top_k / max(rate, 1e-3) * 1.2)
+        return max(self.top_k, min(k, self.top_k * _OVERFETCH_MAX_MULT))
+
+    def _observe_pass_rate(self, sig, kept: int, examined: int):
+        """Fold one query's post-filter pass rate into the signature's EWMA."""
+        observed = kept / examined
+        previous = self._pass_rate.get(sig)
+        if previous is None:
+            if len(self._pass_rate) >= 256:
+                self._pass_rate.clear()
+            self._pass_rate[sig] = observed
+        else:
+            self._pass_rate[sig] = previous + _PASS_RATE_EWMA_ALPHA * (observed - previous)
+
+    def _compiled_filters(self, filters: dict):
+        """Return the compiled predicate for `filters`, compiling on first use."""
+        entry = self._filter_cache.get(id(filters))
+        if entry is not None and entry[0] is filters:
+            return entry[1]
+        if len(self._filter_cache) >= 256:
+            self._filter_cache.clear()
+        predicate = _compile_filters(filters)
+        self._filter_cache[id(filters)] = (filters, predicate)
+        return predicate
+
+    def _matches_filters(self, metadata: dict, filters: dict) -> bool:
+        """Check if metadata matches all filter criteria."""
+        return self._compiled_filters(filters)(metadata)
 
 
@@ -5,15 +5,39 @@ from datetime import datetime
 from app.config.settings import META_PATH, DATA_PATH
 from app.observability.logger import logger
 
-REGISTRY_FILE = "mlops/model_registry.json"
+# Append-only JSONL: one entry per line, so registering is O(1) no
+# matter how long the history grows (the old single-JSON file was
+# read-whole + rewrite-whole on every run)
+REGISTRY_FILE = "mlops/model_registry.jsonl"
+
+# Previous format, migrated once if found
+LEGACY_REGISTRY_FILE = "mlops/model_registry.json"
+
+
+def read_registry(path=REGISTRY_FILE):
+    """Yield registry entries oldest-first, streaming one line at a time."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
 
 def hash_file(path):
     if not os.path.exists(path):
         return None
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        h.update(f.read())
-    return h.hexdigest()
+    # Stream the file through the hash instead of f.read()-ing it whole:
+    # peak RAM stays one block regardless of artifact size, and SHA-256
+    # runs over cache-resident chunks. file_digest (3.11+) does the same
+    # loop in C without a GIL round-trip per block.
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256()
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+        return h.hexdigest()
 
 if __name__ == "__main__":
     if not os.path.exists(META_PATH):
@@ -30,16 +54,20 @@ if __name__ == "__main__":
         "artifact_hash": hash_file(META_PATH),
     }
 
-    registry = []
-    if os.path.exists(REGISTRY_FILE):
-        with open(REGISTRY_FILE, "r") as f:
-            registry = json.load(f)
+    os.makedirs(os.path.dirname(REGISTRY_FILE), exist_ok=True)
 
-    registry.append(entry)
+    # One-time migration from the old rewrite-the-world JSON format
+    if os.path.exists(LEGACY_REGISTRY_FILE) and not os.path.exists(REGISTRY_FILE):
+        with open(LEGACY_REGISTRY_FILE, "r") as f:
+            legacy = json.load(f)
+        with open(REGISTRY_FILE, "w") as f:
+            for old_entry in legacy:
+                f.write(json.dumps(old_entry) + "\n")
+        os.remove(LEGACY_REGISTRY_FILE)
 
-    os.makedirs(os.path.dirname(REGISTRY_FILE), exist_ok=True)
-    with open(REGISTRY_FILE, "w") as f:
-        json.dump(registry, f, indent=2)
+    # O(1) append — a single line per registration, never a rewrite
+    with open(REGISTRY_FILE, "a") as f:
+        f.write(json.dumps(entry) + "\n")
 
     logger.info("model_registry_updated", extra={"document_path": DATA_PATH})
     print(f"Model registry updated, entry added for {DATA_PATH}")
@@ -1,5 +1,11 @@
+import numpy as np
 import pytest
-from app.retrieval.retriever import Retriever
+from app.retrieval.retriever import (
+    Retriever,
+    _build_meta_columns,
+    _columnar_mask,
+    _compile_filters,
+)
 
 @pytest.fixture
 def sample_docs():
@@ -44,3 +50,57 @@ def test_retrieve_with_range_filter(sample_docs, sample_metadata):
     # Filter by chunk size range
     results = retriever.retrieve(query, filters={"chunk_size": {"$gte": 12}})
     assert isinstance(results, list)
+
+def test_retrieve_with_lt_filter(sample_docs, sample_metadata):
+    retriever = Retriever("sentence-transformers/all-MiniLM-L6-v2", top_k=2, enable_metadata=True)
+    retriever.build(sample_docs, sample_metadata)
+
+    # Only chunk_size 11 is strictly below the bound — $lt must keep
+    # exactly that document (guards the corrected comparison direction)
+    results = retriever.retrieve("Hello", filters={"chunk_size": {"$lt": 12}})
+    assert results == ["Hello world"]
+
+def test_retrieve_with_ne_filter(sample_docs, sample_metadata):
+    retriever = Retriever("sentence-transformers/all-MiniLM-L6-v2", top_k=3, enable_metadata=True)
+    retriever.build(sample_docs, sample_metadata)
+
+    results = retriever.retrieve("test", filters={"chunk_id": {"$ne": 1}})
+    assert "Test document" not in results
+    assert len(results) <= 2
+
+def test_retrieve_with_in_filter(sample_docs, sample_metadata):
+    retriever = Retriever("sentence-transformers/all-MiniLM-L6-v2", top_k=3, enable_metadata=True)
+    retriever.build(sample_docs, sample_metadata)
+
+    results = retriever.retrieve("test", filters={"chunk_id": {"$in": [0, 2]}})
+    assert "Test document" not in results
+    assert all(r in ("Hello world", "Another sentence") for r in results)
+
+def test_retrieve_with_unsatisfiable_filter(sample_docs, sample_metadata):
+    retriever = Retriever("sentence-transformers/all-MiniLM-L6-v2", top_k=2, enable_metadata=True)
+    retriever.build(sample_docs, sample_metadata)
+
+    # No chunk passes: both the ID-selector and over-fetch paths must
+    # return an empty list rather than unfiltered results
+    results = retriever.retrieve("Hello", filters={"chunk_size": {"$gt": 100}})
+    assert results == []
+
+def test_columnar_mask_matches_compiled_predicate():
+    # The vectorized columnar path and the compiled per-row predicate
+    # are alternative implementations of the same filter semantics —
+    # they must agree on every operator
+    metadata = [{"chunk_id": i, "chunk_size": 10 + 3 * (i % 7)} for i in range(40)]
+    cols = _build_meta_columns(metadata)
+    cand = np.arange(len(metadata))
+    for filters in (
+        {"chunk_size": {"$lt": 16}},
+        {"chunk_size": {"$lte": 16}},
+        {"chunk_size": {"$gt": 19}},
+        {"chunk_size": {"$gte": 13, "$ne": 19}},
+        {"chunk_id": {"$in": [1, 5, 30]}},
+        {"chunk_id": 4},
+    ):
+        mask = _columnar_mask(cols, cand, filters)
+        predicate = _compile_filters(filters)
+        assert mask is not None
+        assert mask.tolist() == [predicate(m) for m in metadata]
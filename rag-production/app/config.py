@@ -14,6 +14,10 @@ GEN_MODEL = os.getenv(
 # Retrieval Configuration
 TOP_K = int(os.getenv("TOP_K", 3))
 
+# Token-window chunking for indexing (window size / overlap in tokens)
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", 256))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", 32))
+
 # Generation Configuration
 MAX_NEW_TOKENS = int(os.getenv("MAX_NEW_TOKENS", 256))
 MIN_NEW_TOKENS = int(os.getenv("MIN_NEW_TOKENS", 20))
@@ -25,12 +29,19 @@ NO_REPEAT_NGRAM_SIZE = int(os.getenv("NO_REPEAT_NGRAM_SIZE", 3))
 DO_SAMPLE = False
 NUM_BEAMS = 1
 TEMPERATURE = 0.0
-EARLY_STOPPING = False
+# Stop as soon as no active hypothesis can beat the current best
+# (no-op at num_beams=1, prunes finished beams as soon as beams > 1)
+EARLY_STOPPING = True
 LENGTH_PENALTY = 1.2
 
 # Data
 DATA_PATH = os.getenv("DATA_PATH", "data/doc1.txt")
 
+# mmap the FAISS index on load: pages are faulted in as probed instead
+# of reading the whole file, and workers share them. Not every index
+# type supports it, so the loader falls back to a full read.
+INDEX_MMAP = os.getenv("INDEX_MMAP", "true").lower() == "true"
+
 # Artifacts (MLOps)
 ARTIFACT_DIR = "artifacts"
 INDEX_DIR = f"{ARTIFACT_DIR}/index"
@@ -38,3 +49,7 @@ META_DIR = f"{ARTIFACT_DIR}/meta"
 
 INDEX_PATH = f"{INDEX_DIR}/faiss.index"
 META_PATH = f"{META_DIR}/index.json"
+
+# INT8 ONNX exports (built on first start, reused after)
+GEN_INT8_DIR = f"{ARTIFACT_DIR}/gen_int8"
+EMBED_INT8_DIR = f"{ARTIFACT_DIR}/embed_int8"
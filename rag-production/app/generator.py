@@ -1,8 +1,12 @@
+import contextlib
+import json
+import math
+import os
 import torch
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from app.observability import logger
 from app.config import (
     MIN_NEW_TOKENS,
-    MAX_NEW_TOKENS,
     DO_SAMPLE,
     NUM_BEAMS,
     TEMPERATURE,
@@ -10,22 +14,128 @@ from app.config import (
     NO_REPEAT_NGRAM_SIZE,
     LENGTH_PENALTY,
     EARLY_STOPPING,
+    GEN_INT8_DIR,
+    META_PATH,
 )
 
+
+def _observed_token_cap(default: int) -> int:
+    """Cap decode length at mean + 2*std of recorded answer lengths, if any."""
+    try:
+        with open(META_PATH) as f:
+            meta = json.load(f)
+        mean_out = meta["answer_tokens_mean"]
+        std_out = meta["answer_tokens_std"]
+        return min(default, int(math.ceil(mean_out + 2 * std_out)))
+    except Exception:
+        return default
+
+
+def _load_int8_onnx(model_name: str):
+    """Export + dynamically quantize the model to int8 ONNX (cached on disk)."""
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    if not os.path.isdir(GEN_INT8_DIR):
+        export_dir = GEN_INT8_DIR + ".export"
+        ORTModelForSeq2SeqLM.from_pretrained(
+            model_name, export=True, use_cache=True
+        ).save_pretrained(export_dir)
+
+        qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        for onnx_file in os.listdir(export_dir):
+            if onnx_file.endswith(".onnx"):
+                quantizer = ORTQuantizer.from_pretrained(export_dir, file_name=onnx_file)
+                quantizer.quantize(save_dir=GEN_INT8_DIR, quantization_config=qconfig)
+
+    return ORTModelForSeq2SeqLM.from_pretrained(GEN_INT8_DIR)
+
+
+def _bf16_supported(device: torch.device) -> bool:
+    if device.type == "cuda":
+        return torch.cuda.is_bf16_supported()
+    try:
+        # AVX512-BF16 / AMX; anything older emulates bf16 slower than fp32
+        return "BF16" in str(torch.backends.cpu.get_cpu_capability())
+    except Exception:
+        return False
+
+
+_PROMPT_PREFIX = "Answer using only the context.\n\nContext:\n"
+
+
 class Generator:
     def __init__(self, model_name: str, max_new_tokens: int):
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-        self.max_new_tokens = max_new_tokens
+        # The prompt preamble is identical for every request — tokenize
+        # it once and concatenate per-request ids onto it in generate()
+        self._prefix_ids = self.tokenizer(
+            _PROMPT_PREFIX,
+            add_special_tokens=False,
+            return_tensors="pt",
+        ).input_ids
+        # Most of the decode budget is wasted when typical answers are
+        # short — trim the cap to observed answer-length statistics
+        self.max_new_tokens = _observed_token_cap(max_new_tokens)
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
-        self.model.eval()
+        self._prefix_ids = self._prefix_ids.to(self.device)
 
-    def generate(self, question: str, context: list[str]) -> str:
-        prompt = f"""Answer using only the context.
+        # On CPU, prefer an int8 ONNX Runtime export: decoder matmuls run
+        # as int8 dot products (VNNI) instead of FP32 FMAs, and generate()
+        # stays a drop-in. Falls back to plain torch if optimum is missing.
+        self.model = None
+        self.backend = "torch"
+        self._autocast_dtype = None
+        if self.device.type == "cpu":
+            try:
+                self.model = _load_int8_onnx(model_name)
+                self.backend = "onnx"
+                logger.info("generator_backend", extra={"backend": "onnx_int8"})
+            except Exception:
+                logger.warning("onnx_int8_unavailable_falling_back_to_torch")
 
-Context:
-{chr(10).join(context)}
+        if self.model is None:
+            self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+            self.model.to(self.device)
+            self.model.eval()
+            # KV cache: without it every decode step recomputes the
+            # self-attention projections for the whole prefix
+            self.model.config.use_cache = True
+
+            # bf16 halves weight/activation bandwidth (tensor cores on
+            # Ampere+, AVX512-BF16/AMX on recent CPUs); generate() runs
+            # under a matching autocast below
+            if _bf16_supported(self.device):
+                if self.device.type == "cuda":
+                    self.model = self.model.to(dtype=torch.bfloat16)
+                self._autocast_dtype = torch.bfloat16
+
+            # compile trims per-decode-step Python/dispatch overhead;
+            # harmless no-op fallback on older torch
+            try:
+                self.model = torch.compile(self.model, mode="reduce-overhead")
+            except Exception:
+                pass
+
+        # Warm-up: the first decode pays kernel compilation, cuBLAS
+        # handle creation and KV-cache allocation — do it at boot, not
+        # on the first /ask. Twice, so torch.compile's dynamic-shape
+        # guards specialize before traffic arrives.
+        try:
+            warm = self.tokenizer("warmup", return_tensors="pt").to(self.device)
+            with torch.no_grad(), self._autocast():
+                for _ in range(2):
+                    self.model.generate(**warm, max_new_tokens=4, do_sample=False)
+        except Exception:
+            logger.warning("generator_warmup_failed")
+
+    def _autocast(self):
+        if self._autocast_dtype is None:
+            return contextlib.nullcontext()
+        return torch.autocast(self.device.type, dtype=self._autocast_dtype)
+
+    def generate(self, question: str, context: list[str]) -> str:
+        suffix = f"""{chr(10).join(context)}
 
 Question:
 {question}
@@ -33,12 +143,23 @@ Question:
 Answer:
 """
         try:
-            inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
-            with torch.no_grad():
+            # Only the per-request part is tokenized; the cached prefix
+            # ids are concatenated in front (suffix keeps the special
+            # tokens, so the sequence still ends with EOS)
+            suffix_ids = self.tokenizer(
+                suffix, return_tensors="pt"
+            ).input_ids.to(self.device)
+            input_ids = torch.cat([self._prefix_ids, suffix_ids], dim=1)
+            inputs = {
+                "input_ids": input_ids,
+                "attention_mask": torch.ones_like(input_ids),
+            }
+            with torch.no_grad(), self._autocast():
                outputs = self.model.generate(
                 **inputs,
-                max_new_tokens=MAX_NEW_TOKENS,
+                max_new_tokens=self.max_new_tokens,
                 min_new_tokens=MIN_NEW_TOKENS,
+                use_cache=True,
                 do_sample=DO_SAMPLE,
                 num_beams=NUM_BEAMS,
                 temperature=TEMPERATURE,
@@ -50,3 +171,39 @@ Answer:
             return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
         except Exception as e:
             return f"Error generating answer: {str(e)}"
+
+    def generate_batch(self, questions: list[str], contexts: list[list[str]]) -> list[str]:
+        prompts = [
+            f"""Answer using only the context.
+
+Context:
+{chr(10).join(context)}
+
+Question:
+{question}
+
+Answer:
+"""
+            for question, context in zip(questions, contexts)
+        ]
+        try:
+            # Padded batch through a single generate() call — the decoder
+            # steps over all prompts at once instead of once per request
+            inputs = self.tokenizer(prompts, padding=True, return_tensors="pt").to(self.device)
+            with torch.no_grad(), self._autocast():
+                outputs = self.model.generate(
+                    **inputs,
+                    max_new_tokens=self.max_new_tokens,
+                    min_new_tokens=MIN_NEW_TOKENS,
+                    use_cache=True,
+                    do_sample=DO_SAMPLE,
+                    num_beams=NUM_BEAMS,
+                    temperature=TEMPERATURE,
+                    repetition_penalty=REPETITION_PENALTY,
+                    no_repeat_ngram_size=NO_REPEAT_NGRAM_SIZE,
+                    length_penalty=LENGTH_PENALTY,
+                    early_stopping=EARLY_STOPPING,
+                )
+            return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        except Exception as e:
+            return [f"Error generating answer: {str(e)}"] * len(questions)
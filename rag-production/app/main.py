@@ -1,9 +1,33 @@
+import asyncio
+import concurrent.futures
+import os
+
+# Split the cores between request workers and torch intra-op threads so
+# concurrent generate() calls don't oversubscribe. OMP_NUM_THREADS must
+# be set before torch is first imported (below, via app.pipeline).
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", 2))
+_TORCH_THREADS = max(1, (os.cpu_count() or 1) // WORKER_THREADS)
+os.environ.setdefault("OMP_NUM_THREADS", str(_TORCH_THREADS))
+
+import torch
+
 from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.pipeline import RAGPipeline
 from app.config import DATA_PATH
 
+torch.set_num_threads(_TORCH_THREADS)
+
+# Model work runs on this pool, never on the event loop — /health stays
+# responsive while /ask batches are generating
+EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=WORKER_THREADS)
+
+# Micro-batching: requests arriving within the window share one batched
+# encode, one FAISS search, and one generate() call
+MAX_BATCH = int(os.getenv("MAX_BATCH", 8))
+MAX_WAIT_MS = float(os.getenv("MAX_WAIT_MS", 5))
+
 app = FastAPI(title="Lightweight Extractive RAG API")
 
 # CORS
@@ -17,6 +41,44 @@ app.add_middleware(
 pipeline = RAGPipeline()
 pipeline.load_from_file(DATA_PATH)
 
+_queue: asyncio.Queue = asyncio.Queue()
+
+
+async def _batch_worker():
+    # Pops one request, then drains up to MAX_BATCH-1 more within the
+    # wait window before handing the whole batch to answer_batch in a
+    # worker thread — the event loop never blocks on model work
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _queue.get()]
+        deadline = loop.time() + MAX_WAIT_MS / 1000
+        while len(batch) < MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        questions = [q for q, _ in batch]
+        try:
+            answers = await loop.run_in_executor(EXECUTOR, pipeline.answer_batch, questions)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            continue
+
+        for (_, future), answer in zip(batch, answers):
+            if not future.done():
+                future.set_result(answer)
+
+
+@app.on_event("startup")
+async def start_batch_worker():
+    asyncio.create_task(_batch_worker())
+
 # Global error handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -25,9 +87,11 @@ async def global_exception_handler(request: Request, exc: Exception):
 # Async endpoints
 @app.get("/ask")
 async def ask(q: str = Query(..., description="Question to ask")):
+    future = asyncio.get_running_loop().create_future()
+    await _queue.put((q, future))
     return {
         "question": q,
-        "answer": pipeline.answer(q),
+        "answer": await future,
     }
 
 @app.get("/reload")
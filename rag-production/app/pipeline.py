@@ -1,8 +1,10 @@
 import os
 import json
 import time
+import hashlib
 from datetime import datetime
 import faiss
+import numpy as np
 
 from app.retriever import Retriever
 from app.generator import Generator
@@ -11,20 +13,38 @@ from app.config import (
     EMBED_MODEL,
     GEN_MODEL,
     TOP_K,
+    CHUNK_TOKENS,
+    CHUNK_OVERLAP_TOKENS,
     MAX_NEW_TOKENS,
     INDEX_PATH,
     META_PATH,
     INDEX_DIR,
     META_DIR,
+    INDEX_MMAP,
 )
 
 
+def _read_index(path: str) -> faiss.Index:
+    if INDEX_MMAP:
+        try:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except Exception:
+            # Some index types only mmap in recent FAISS — load normally
+            logger.warning("index_mmap_failed_loading_into_ram")
+    return faiss.read_index(path)
+
+
 class RAGPipeline:
     def __init__(self):
         self.retriever = Retriever(EMBED_MODEL, TOP_K)
         self.generator = Generator(GEN_MODEL, MAX_NEW_TOKENS)
         self.current_doc_path = None
 
+        # question -> answer, keyed alongside the corpus hash so a
+        # reload with different documents never serves stale answers
+        self._answer_cache = {}
+        self._corpus_hash = None
+
         os.makedirs(INDEX_DIR, exist_ok=True)
         os.makedirs(META_DIR, exist_ok=True)
 
@@ -33,12 +53,28 @@ class RAGPipeline:
             raise FileNotFoundError(file_path)
 
         with open(file_path, "r", encoding="utf-8") as f:
-            docs = [l.strip() for l in f if l.strip()]
+            text = f.read()
+
+        try:
+            docs = self._chunk_documents(text)
+        except Exception:
+            logger.warning("token_chunking_failed_falling_back_to_lines")
+            docs = [l.strip() for l in text.splitlines() if l.strip()]
+
+        # Same dedup as Retriever.build, applied BEFORE the branch
+        # below: the persisted index was built over unique chunks, so
+        # the warm-load path must hand load_index the identical list or
+        # FAISS ids and documents misalign from the first duplicate on
+        docs = list(dict.fromkeys(docs))
 
         self.current_doc_path = file_path
+        self._corpus_hash = hashlib.sha256(
+            b"\n".join(d.encode() for d in docs)
+        ).hexdigest()
+        self._answer_cache = {}
 
         if os.path.exists(INDEX_PATH) and not force_rebuild:
-            index = faiss.read_index(INDEX_PATH)
+            index = _read_index(INDEX_PATH)
             self.retriever.load_index(index, docs)
             logger.info("index_loaded", extra={"path": INDEX_PATH})
         else:
@@ -63,9 +99,44 @@ class RAGPipeline:
             extra={"file_path": file_path, "force_rebuild": force_rebuild},
         )
 
+    def _chunk_documents(self, text: str) -> list[str]:
+        # Tokenize the whole document once and slice overlapping token
+        # windows out of the id array — no per-line Python loop, and
+        # chunk boundaries no longer depend on the source line lengths
+        tokenizer = self.retriever.model.tokenizer
+        ids = tokenizer(text, add_special_tokens=False).input_ids
+        if len(ids) <= CHUNK_TOKENS:
+            text = text.strip()
+            return [text] if text else []
+
+        step = CHUNK_TOKENS - CHUNK_OVERLAP_TOKENS
+        ids = np.asarray(ids, dtype=np.int64)
+        windows = list(
+            np.lib.stride_tricks.sliding_window_view(ids, CHUNK_TOKENS)[::step]
+        )
+        if (len(ids) - CHUNK_TOKENS) % step:
+            # Tail shorter than a full stride — keep it as one last
+            # full-width window ending at the document boundary
+            windows.append(ids[-CHUNK_TOKENS:])
+
+        chunks = tokenizer.batch_decode(windows, skip_special_tokens=True)
+        return [c.strip() for c in chunks if c.strip()]
+
     def answer(self, question: str) -> str:
         start = time.time()
 
+        cache_key = (self._corpus_hash, question)
+        cached = self._answer_cache.get(cache_key)
+        if cached is not None:
+            logger.info(
+                "rag_request",
+                extra={
+                    "event": "cache_hit",
+                    "latency_ms": int((time.time() - start) * 1000),
+                },
+            )
+            return cached
+
         context = self.retriever.retrieve(question)
 
         if not context:
@@ -88,9 +159,65 @@ class RAGPipeline:
             "rag_request",
             extra={
                 "event": "success",
+                "cache": "miss",
                 "retrieved_chunks": len(context),
                 "latency_ms": int((time.time() - start) * 1000),
             },
         )
 
+        if len(self._answer_cache) >= 1024:
+            self._answer_cache.clear()
+        self._answer_cache[cache_key] = answer
+
         return answer
+
+    def answer_batch(self, questions: list[str]) -> list[str]:
+        start = time.time()
+
+        answers = [None] * len(questions)
+        pending = []
+        for i, question in enumerate(questions):
+            cached = self._answer_cache.get((self._corpus_hash, question))
+            if cached is not None:
+                answers[i] = cached
+            else:
+                pending.append(i)
+
+        if pending:
+            pending_questions = [questions[i] for i in pending]
+            contexts = self.retriever.retrieve_batch(pending_questions)
+
+            to_generate = []
+            for i, question, context in zip(pending, pending_questions, contexts):
+                if context:
+                    to_generate.append((i, question, context))
+                else:
+                    answers[i] = "No relevant information found."
+
+            if to_generate:
+                try:
+                    generated = self.generator.generate_batch(
+                        [q for _, q, _ in to_generate],
+                        [c for _, _, c in to_generate],
+                    )
+                except Exception as e:
+                    logger.error("generator_error", exc_info=True)
+                    generated = [f"Error generating answer: {str(e)}"] * len(to_generate)
+
+                for (i, question, _), generated_answer in zip(to_generate, generated):
+                    answers[i] = generated_answer
+                    if len(self._answer_cache) >= 1024:
+                        self._answer_cache.clear()
+                    self._answer_cache[(self._corpus_hash, question)] = generated_answer
+
+        logger.info(
+            "rag_request",
+            extra={
+                "event": "batch",
+                "batch_size": len(questions),
+                "cache_hits": len(questions) - len(pending),
+                "latency_ms": int((time.time() - start) * 1000),
+            },
+        )
+
+        return answers
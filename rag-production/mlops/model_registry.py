@@ -12,22 +12,47 @@ from datetime import datetime
 from app.config import META_PATH, DATA_PATH
 from app.observability import logger
 
+try:
+    import orjson  # ~5-10x faster than json on dumps; optional
+except ImportError:
+    orjson = None
+
 REGISTRY_FILE = "mlops/model_registry.json"
 
+def _loads(data):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def _dump(obj, path):
+    if orjson:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, "w") as f:
+            json.dump(obj, f, indent=2)
+
 def hash_file(path):
     if not os.path.exists(path):
         return None
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        h.update(f.read())
+    # Stream through one reusable 1 MiB buffer: constant memory, no
+    # per-block bytes allocations, and each update feeds OpenSSL a
+    # contiguous cache-resident buffer so SHA-NI can run flat out
+    try:
+        h = hashlib.new("sha256", usedforsecurity=False)
+    except TypeError:  # pre-3.9 hashlib has no usedforsecurity
+        h = hashlib.sha256()
+    buf = bytearray(1 << 20)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while n := f.readinto(view):
+            h.update(view[:n])
     return h.hexdigest()
 
 if __name__ == "__main__":
     if not os.path.exists(META_PATH):
         raise FileNotFoundError(f"Metadata file not found: {META_PATH}")
 
-    with open(META_PATH, "r") as f:
-        meta = json.load(f)
+    with open(META_PATH, "rb") as f:
+        meta = _loads(f.read())
 
     entry = {
         "timestamp": datetime.utcnow().isoformat(),
@@ -39,14 +64,13 @@ if __name__ == "__main__":
 
     registry = []
     if os.path.exists(REGISTRY_FILE):
-        with open(REGISTRY_FILE, "r") as f:
-            registry = json.load(f)
+        with open(REGISTRY_FILE, "rb") as f:
+            registry = _loads(f.read())
 
     registry.append(entry)
 
     os.makedirs(os.path.dirname(REGISTRY_FILE), exist_ok=True)
-    with open(REGISTRY_FILE, "w") as f:
-        json.dump(registry, f, indent=2)
+    _dump(registry, REGISTRY_FILE)
 
     logger.info("model_registry_updated", extra={"document_path": DATA_PATH})
     print(f"Model registry updated, entry added for {DATA_PATH}")
@@ -7,6 +7,11 @@ Captures index size, embedding dimensions, top-K, and model versions for monitor
 import json
 import os
 from datetime import datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from app.pipeline import RAGPipeline
 from app.config import DATA_PATH, META_PATH
 from app.observability import logger
@@ -20,8 +25,8 @@ if __name__ == "__main__":
 
     meta = {}
     if os.path.exists(META_PATH):
-        with open(META_PATH, "r") as f:
-            meta = json.load(f)
+        with open(META_PATH, "rb") as f:
+            meta = orjson.loads(f.read()) if orjson else json.loads(f.read())
 
     snapshot = {
         "timestamp": datetime.utcnow().isoformat(),
@@ -33,8 +38,12 @@ if __name__ == "__main__":
     }
 
     snapshot_file = os.path.join(SNAPSHOT_DIR, "snapshot.json")
-    with open(snapshot_file, "w") as f:
-        json.dump(snapshot, f, indent=2)
+    if orjson:
+        with open(snapshot_file, "wb") as f:
+            f.write(orjson.dumps(snapshot, option=orjson.OPT_INDENT_2))
+    else:
+        with open(snapshot_file, "w") as f:
+            json.dump(snapshot, f, indent=2)
 
     logger.info("monitoring_snapshot_saved", extra={"snapshot_file": snapshot_file})
     print(f"Monitoring snapshot saved at {snapshot_file}")